@@ -201,10 +201,14 @@ const App = () => {
              socketRef.current.close();
         }
         socketRef.current = new WebSocket("ws://127.0.0.1:8000/ws");
+        socketRef.current.binaryType = "arraybuffer"; // server sends binary JSON frames
         socketRef.current.onopen = () => { console.log("✅ WebSocket Connected"); };
         socketRef.current.onmessage = (event) => {
             try {
-                const receivedData = JSON.parse(event.data);
+                const rawData = typeof event.data === "string"
+                    ? event.data
+                    : new TextDecoder().decode(event.data);
+                const receivedData = JSON.parse(rawData);
                 if (receivedData.drones && Array.isArray(receivedData.drones)) {
                     console.log(`Received ${receivedData.drones.length} drones via WebSocket.`);
                     // Process WebSocket drones
@@ -1,48 +1,76 @@
+import hashlib
 import os
 import smtplib
-import requests
+import threading
+import aiohttp
 import uvicorn
 import json
+import orjson
 import asyncio
+import atexit
+import concurrent.futures
+import functools
 import logging
+import logging.handlers
+import queue
 import time
 from dotenv import load_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
-from math import radians, cos, sin, sqrt, atan2
-import random
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from math import radians, cos, sin, sqrt, asin
+import heapq
+import numpy as np
 from typing import List, Dict, Any, Optional
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 
 # --- Setup & Configuration ---
 
 # Attempt to import drone_db safely
 try:
-    from drone_db import log_drone
+    from drone_db import log_drone, init_db
     DRONE_DB_ENABLED = True
-except ImportError:
+except (ImportError, KeyError, ValueError):  # missing module, unset DB env vars, or bad DB_PORT
     DRONE_DB_ENABLED = False
     # Define a placeholder if drone_db is optional
     def log_drone(drone_data: Dict[str, Any]):
         # print(f"DB Logging Disabled: {drone_data.get('callsign')}") # Uncomment for debug print
         pass
 
+# Attempt to import numba for JIT-compiled distance kernels (optional)
+try:
+    import numba
+    NUMBA_ENABLED = True
+except ImportError:
+    NUMBA_ENABLED = False
+
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 # Set level to DEBUG to see all logs, INFO for less verbosity
 LOG_LEVEL = logging.DEBUG # Or logging.INFO
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Route records through an unbounded queue drained by a listener thread, so a
+# log call from the event loop is a lock-free enqueue instead of a write()
+# syscall; the listener owns the actual stream I/O.
+_log_queue: queue.Queue = queue.Queue(-1)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+# Attach the queue handler directly (basicConfig would slap its default
+# formatter onto it, baking a second format pass into every record)
+logging.getLogger().setLevel(LOG_LEVEL)
+logging.getLogger().addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop) # flush buffered records at shutdown
 logger = logging.getLogger("main") # Use specific logger name
 if not DRONE_DB_ENABLED:
     logger.warning("Drone DB module not found or 'log_drone' function missing. DB logging disabled.")
 
-app = FastAPI(title="Illegal Drone Tracking API")
+# orjson for every dict-returning endpoint (home, /force-drone, ...) — the
+# larger endpoints already return ORJSONResponse/Response explicitly
+app = FastAPI(title="Illegal Drone Tracking API", default_response_class=ORJSONResponse)
 
 # OpenSky API URL
 OPENSKY_URL = "https://opensky-network.org/api/states/all"
@@ -70,8 +98,93 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400, # Let browsers cache CORS preflights for a day
 )
 
+# Compress larger REST bodies (zone list, drone packets) — JSON with repeated
+# keys deflates well; small responses skip the compressor entirely
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+async def background_email_worker():
+    """Drains queued alert batches and sends them off the fetch path.
+
+    Anything queued behind the first batch is coalesced into a single SMTP
+    send, so a slow send can't cause a backlog of individual emails."""
+    while True:
+        batch = await ALERT_QUEUE.get()
+        while not ALERT_QUEUE.empty():
+            try:
+                batch.extend(ALERT_QUEUE.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, send_batched_alert_email, batch)
+        except Exception as e:
+            logger.error(f"Background email worker send failed: {e}", exc_info=True)
+
+@app.on_event("startup")
+async def startup_email_worker():
+    """Create the alert queue and start its worker on the running loop."""
+    global ALERT_QUEUE
+    # Bounded: if SMTP stalls long enough to back up 100 batches, dropping
+    # new ones (with a log) beats growing the queue without limit
+    ALERT_QUEUE = asyncio.Queue(maxsize=100)
+    asyncio.create_task(background_email_worker())
+
+@app.on_event("startup")
+async def startup_executor():
+    """Install a small named default executor for blocking offloads.
+
+    The only run_in_executor work left is SMTP sends (serialized by the
+    connection lock anyway), so asyncio's default min(32, cpus+4) pool is
+    oversized; a few named threads make stack traces readable and keep idle
+    thread count down. Size is tunable via BLOCKING_POOL_SIZE."""
+    asyncio.get_running_loop().set_default_executor(
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=int(os.getenv("BLOCKING_POOL_SIZE", "4")),
+            thread_name_prefix="blocking",
+        )
+    )
+
+@app.on_event("startup")
+async def startup_redis():
+    """Connect the shared alert-cooldown cache when REDIS_URL is set."""
+    global _redis
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        return
+    try:
+        import redis.asyncio as aioredis
+        _redis = aioredis.from_url(redis_url)
+        await _redis.ping()
+        logger.info("Redis alert-cooldown cache connected.")
+    except Exception as e:
+        logger.warning(f"Redis unavailable ({e}); using in-process alert cooldowns.")
+        _redis = None
+
+@app.on_event("startup")
+async def startup_http_client():
+    """Shared pooled aiohttp session: keep-alive + TLS reuse to OpenSky."""
+    app.state.http = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=15),
+        connector=aiohttp.TCPConnector(limit=4, ttl_dns_cache=300),
+    )
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await app.state.http.close()
+
+@app.on_event("startup")
+async def startup_db():
+    """Create the drone_logs table/index once at startup (not at import)."""
+    if DRONE_DB_ENABLED:
+        try:
+            init_db()
+            logger.info("Drone DB schema initialized.")
+        except Exception as e:
+            logger.error(f"Drone DB schema init failed: {e}", exc_info=True)
+
 # --- Constants & Definitions ---
 
 # Restricted Zones
@@ -101,37 +214,169 @@ RESTRICTED_ZONES = [
     {"name": "Groom Lake Facility (CIA)", "latitude": 37.2491, "longitude": -115.8001, "radius": 12, "type": "Government"},
 ]
 
+def _validate_zones(zones: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Validate zone entries once at import so the hot paths can trust the
+    precomputed arrays and skip per-call key/type checks entirely."""
+    valid_zones = []
+    for zone in zones:
+        if not all(k in zone for k in ("latitude", "longitude", "radius", "name")):
+            logger.warning(f"Skipping zone due to missing keys: {zone.get('name', 'Unknown')}")
+            continue
+        if not all(isinstance(zone[k], (int, float)) for k in ("latitude", "longitude", "radius")):
+            logger.warning(f"Skipping zone due to invalid coordinate/radius types: {zone.get('name', 'Unknown')}")
+            continue
+        valid_zones.append(zone)
+    return valid_zones
+
+_VALID_ZONES = _validate_zones(RESTRICTED_ZONES)
+
+# Precomputed zone geometry as parallel NumPy arrays (radians) so the zone
+# check runs as a handful of SIMD-backed ufunc calls instead of ~20 Python
+# haversine() calls per drone.
+EARTH_RADIUS_KM = 6371.0
+_ZONE_NAMES: List[str] = [z["name"] for z in _VALID_ZONES]
+_ZONES_LAT = np.radians([z["latitude"] for z in _VALID_ZONES])
+_ZONES_LON = np.radians([z["longitude"] for z in _VALID_ZONES])
+_ZONES_RADIUS = np.array([z["radius"] for z in _VALID_ZONES], dtype=np.float64)
+_ZONES_COS_LAT = np.cos(_ZONES_LAT)
+# Squared angular radii for the equirectangular containment test: every zone
+# radius is <=15 km, where d^2 ~ R^2*(dlat^2 + (cos(lat)*dlon)^2) agrees with
+# haversine to <0.01%, and comparing squares needs no sqrt/arcsin at all.
+_ZONES_RADIUS_RAD_SQ = (_ZONES_RADIUS / EARTH_RADIUS_KM) ** 2
+
+# Union bounding box over all zones (degrees, radius margin included): four
+# float compares answer "nowhere near any zone" before any other work
+_ZONES_MARGIN_DEG = float(np.max(_ZONES_RADIUS)) / 110.57
+_ZONES_BBOX = (
+    float(np.degrees(np.min(_ZONES_LAT))) - _ZONES_MARGIN_DEG, # lat min
+    float(np.degrees(np.max(_ZONES_LAT))) + _ZONES_MARGIN_DEG, # lat max
+    float(np.degrees(np.min(_ZONES_LON))) - _ZONES_MARGIN_DEG * 1.6, # lon min (cos margin)
+    float(np.degrees(np.max(_ZONES_LON))) + _ZONES_MARGIN_DEG * 1.6, # lon max
+)
+
+# The zone list never changes at runtime, so the /restricted-zones response
+# body (and its ETag) can be computed exactly once at import
+_RESTRICTED_ZONES_JSON: bytes = orjson.dumps({"restricted_zones": RESTRICTED_ZONES})
+_RESTRICTED_ZONES_ETAG: str = f'"{hashlib.sha256(_RESTRICTED_ZONES_JSON).hexdigest()}"'
+
+# Latitude-band index (SkyServer "zones" pattern): each zone registers in
+# every 1-degree band it can reach, so a lookup only tests zones whose
+# latitude band overlaps the drone's. With 20 zones the win is modest, but it
+# keeps the scalar check O(candidates) as the zone list grows.
+_BAND_REACH = int(np.ceil(float(np.max(_ZONES_RADIUS)) / 111.0))
+_ZONE_BANDS: Dict[int, np.ndarray] = {}
+for _idx, _zone in enumerate(_VALID_ZONES):
+    _zone_band = int(_zone["latitude"])
+    for _band in range(_zone_band - _BAND_REACH, _zone_band + _BAND_REACH + 1):
+        _ZONE_BANDS.setdefault(_band, []).append(_idx)  # type: ignore[arg-type]
+_ZONE_BANDS = {band: np.array(idxs, dtype=np.intp) for band, idxs in _ZONE_BANDS.items()}
+
 # CONUS bounding box (approximate)
 CONUS_BOUNDS = {
     "lat_min": 24.0, "lat_max": 49.0,
     "lon_min": -125.0, "lon_max": -66.0
 }
 
-# Cache for recently alerted drones (callsign: timestamp)
-ALERTED_DRONES: Dict[str, float] = {}
+def _build_safe_cells() -> List[tuple]:
+    """Precompute 1°x1° CONUS cells that cannot touch any restricted zone.
+
+    A cell is safe when every zone center is farther away from the cell
+    center than the zone radius plus the cell's half-diagonal. Restricted
+    zones cover well under 1% of CONUS, so nearly every cell qualifies and
+    the simulator can sample authorized positions without rejection checks.
+    """
+    cells = []
+    half_diag_km = 111.0 * sqrt(2) / 2 # cell-center to corner, worst case
+    for cell_lat in range(int(CONUS_BOUNDS["lat_min"]), int(CONUS_BOUNDS["lat_max"])):
+        for cell_lon in range(int(CONUS_BOUNDS["lon_min"]), int(CONUS_BOUNDS["lon_max"])):
+            y = _ZONES_LAT - radians(cell_lat + 0.5)
+            x = (_ZONES_LON - radians(cell_lon + 0.5)) * _ZONES_COS_LAT
+            distances = EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+            if np.all(distances > _ZONES_RADIUS + half_diag_km):
+                cells.append((cell_lat, cell_lon))
+    return cells
+
+_SAFE_CELLS = _build_safe_cells()
+
+# Cache for recently alerted drones ((callsign, zone): monotonic timestamp),
+# plus an expiry heap so cleanup pops only entries actually due instead of
+# scanning the whole dict every cycle. Keyed per zone so a drone moving from
+# one restricted zone into another re-alerts instead of being muted by its
+# earlier incursion. Monotonic time keeps cooldowns immune to wall-clock jumps.
+ALERTED_DRONES: Dict[tuple, float] = {}
+_ALERT_HEAP: List[tuple] = [] # (expiry_timestamp, (callsign, zone))
 ALERT_COOLDOWN: int = 300 # 5 minutes in seconds
 
+# Optional Redis-backed cooldowns: with multiple uvicorn workers the
+# in-process dict would fire duplicate alerts per callsign from each worker;
+# SET NX EX makes exactly one worker win. Configured via REDIS_URL at startup.
+_redis = None
+
+async def _should_alert(callsign: str, zone_name: Optional[str], now: float) -> bool:
+    """True when this worker wins the right to alert for this callsign+zone.
+
+    Uses an atomic Redis SET NX EX when configured (multi-worker safe, TTL
+    handles expiry); otherwise falls back to the in-process cooldown cache.
+    """
+    if _redis is not None:
+        try:
+            return bool(await _redis.set(
+                f"alert:{callsign}:{zone_name}", "1", ex=ALERT_COOLDOWN, nx=True
+            ))
+        except Exception as e:
+            logger.warning(f"Redis cooldown check failed ({e}); using in-process cache.")
+    key = (callsign, zone_name)
+    last_alert_time = ALERTED_DRONES.get(key)
+    if last_alert_time is None or (now - last_alert_time) > ALERT_COOLDOWN:
+        ALERTED_DRONES[key] = now
+        heapq.heappush(_ALERT_HEAP, (now + ALERT_COOLDOWN, key))
+        return True
+    logger.debug(f"Drone {callsign} still within alert cooldown for {zone_name} "
+                 f"({now - last_alert_time:.0f}s < {ALERT_COOLDOWN}s).")
+    return False
+
+# Alert email queue: fetch cycles enqueue batches and return immediately
+# instead of blocking 1-5s on the SMTP round-trip (populated at startup)
+ALERT_QUEUE: Optional[asyncio.Queue] = None
+
 # --- Helper Functions ---
 
+def _haversine_kernel(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine distance core in km — no validation or logging so numba can
+    compile it to a SIMD/parallel ufunc when available."""
+    R = 6371.0 # Earth radius in kilometers
+    lat1_rad = radians(lat1)
+    lat2_rad = radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = radians(lon2) - radians(lon1)
+    a = sin(dlat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2
+    # asin(sqrt(a)) == atan2(sqrt(a), sqrt(1-a)) for a in [0,1] but needs one
+    # sqrt and a cheaper inverse-trig call
+    c = 2 * asin(sqrt(a))
+    return R * c
+
+if NUMBA_ENABLED:
+    # Compiles to vectorized transcendentals (SVML when icc-rt is installed)
+    # and accepts scalars or whole arrays alike
+    _haversine_kernel = numba.vectorize(
+        ["float64(float64, float64, float64, float64)"],
+        fastmath=True, target="parallel",
+    )(_haversine_kernel)
+    # Warm the JIT at import so the first real request doesn't eat the
+    # compilation pause (explicit signatures above keep it to a cache load)
+    _haversine_kernel(0.0, 0.0, 1.0, 1.0)
+
 def haversine(lat1: Optional[float], lon1: Optional[float], lat2: float, lon2: float) -> float:
     """Calculate distance between two points on Earth using Haversine."""
-    R = 6371 # Earth radius in kilometers
     if lat1 is None or lon1 is None:
         # Reduced verbosity for common case, change to WARNING if needed
-        logger.debug(f"Haversine called with None coordinates: ({lat1}, {lon1})")
+        logger.debug("Haversine called with None coordinates: (%s, %s)", lat1, lon1)
         return float('inf')
     if not all(isinstance(coord, (int, float)) for coord in [lat1, lon1, lat2, lon2]):
         logger.warning(f"Invalid coordinate types for Haversine: ({lat1} [{type(lat1)}], {lon1} [{type(lon1)}]), ({lat2} [{type(lat2)}], {lon2} [{type(lon2)}])")
         return float('inf')
     try:
-        lat1_rad, lon1_rad, lat2_rad, lon2_rad = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        a = sin(dlat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2) ** 2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        distance = R * c
-        # logger.debug(f"Haversine calc: ({lat1:.4f},{lon1:.4f}) to ({lat2:.4f},{lon2:.4f}) = {distance:.2f} km") # Verbose log
-        return distance
+        return float(_haversine_kernel(lat1, lon1, lat2, lon2))
     except (ValueError, TypeError) as e:
         logger.error(f"Error in Haversine calculation ({lat1}, {lon1} to {lat2}, {lon2}): {e}", exc_info=True)
         return float('inf')
@@ -139,45 +384,72 @@ def haversine(lat1: Optional[float], lon1: Optional[float], lat2: float, lon2: f
 def is_unauthorized_flight(latitude: Optional[float], longitude: Optional[float]) -> tuple[bool, Optional[str]]:
     """Checks if coordinates fall within any defined restricted zone."""
     if latitude is None or longitude is None: return False, None
+    if not all(isinstance(coord, (int, float)) for coord in [latitude, longitude]):
+        logger.warning(f"Invalid coordinate types for zone check: ({latitude} [{type(latitude)}], {longitude} [{type(longitude)}])")
+        return False, None
 
-    # logger.debug(f"--- Checking drone auth at Lat: {latitude:.4f}, Lon: {longitude:.4f} ---") # Debug log
-
-    for zone in RESTRICTED_ZONES:
-        try:
-            # Basic validation
-            if not all(k in zone for k in ["latitude", "longitude", "radius", "name"]):
-                logger.warning(f"Skipping zone due to missing keys: {zone.get('name', 'Unknown')}")
-                continue
-            if not all(isinstance(zone[k], (int, float)) for k in ["latitude", "longitude", "radius"]):
-                logger.warning(f"Skipping zone due to invalid coordinate/radius types: {zone.get('name', 'Unknown')}")
-                continue
-
-            zone_lat = zone["latitude"]
-            zone_lon = zone["longitude"]
-            zone_radius = zone["radius"]
-            zone_name = zone["name"]
-
-            distance = haversine(latitude, longitude, zone_lat, zone_lon)
-
-            # logger.debug(f"Checking against zone '{zone_name}' (R: {zone_radius}km): Dist = {distance:.2f}km") # Verbose
-
-            if distance <= zone_radius:
-                # Log only when found inside for less noise
-                logger.info(f"!!! Drone IN zone '{zone_name}'. Lat: {latitude:.4f}, Lon: {longitude:.4f}. Dist: {distance:.2f}km <= Radius: {zone_radius}km. UNAUTHORIZED")
-                return True, zone_name
+    try:
+        # Prune to zones whose latitude band can reach this drone at all
+        candidates = _ZONE_BANDS.get(int(latitude))
+        if candidates is None:
+            return False, None
+
+        # Vectorized equirectangular containment test against the candidate
+        # zones — squared distances vs squared radii, no sqrt/arcsin needed
+        lat_rad = radians(latitude)
+        y = _ZONES_LAT[candidates] - lat_rad
+        x = (_ZONES_LON[candidates] - radians(longitude)) * _ZONES_COS_LAT[candidates]
+        hits = np.where(x * x + y * y <= _ZONES_RADIUS_RAD_SQ[candidates])[0]
+
+        if hits.size:
+            hit = int(hits[0])
+            idx = int(candidates[hit])
+            zone_name = _ZONE_NAMES[idx]
+            distance = EARTH_RADIUS_KM * sqrt(x[hit] * x[hit] + y[hit] * y[hit])
+            # Log only when found inside for less noise — and only at DEBUG,
+            # since this fires per unauthorized drone per cycle
+            logger.debug("!!! Drone IN zone '%s'. Lat: %.4f, Lon: %.4f. Dist: %.2fkm <= Radius: %skm. UNAUTHORIZED",
+                         zone_name, latitude, longitude, distance, _ZONES_RADIUS[idx])
+            return True, zone_name
 
-        except Exception as e:
-             logger.error(f"Error checking zone {zone.get('name', 'Unknown')} for ({latitude}, {longitude}): {e}", exc_info=True)
+    except Exception as e:
+         logger.error(f"Error checking zones for ({latitude}, {longitude}): {e}", exc_info=True)
 
     # logger.debug(f"--- Drone at Lat: {latitude:.4f}, Lon: {longitude:.4f} is AUTHORIZED ---") # Debug log
     return False, None
 
+def check_zones_bulk(lats: np.ndarray, lons: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized zone check for a whole batch of drones at once.
+
+    Builds an (N_drones, N_zones) haversine matrix in one broadcast and
+    returns (unauthorized[N] bool mask, zone_idx[N]); zone_idx is only
+    meaningful where the mask is True.
+    """
+    lats_rad = np.radians(lats)
+    lons_rad = np.radians(lons)
+    # Same equirectangular squared-distance test as the scalar path; at zone
+    # radii <=15 km the error vs haversine is negligible and it saves the
+    # sin/arcsin/sqrt transcendentals across the whole matrix.
+    y = _ZONES_LAT[None, :] - lats_rad[:, None]
+    x = (_ZONES_LON[None, :] - lons_rad[:, None]) * _ZONES_COS_LAT[None, :]
+    in_zone = x * x + y * y <= _ZONES_RADIUS_RAD_SQ[None, :]
+    return in_zone.any(axis=1), in_zone.argmax(axis=1)
+
 def validate_drone_counts(drone_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Validates consistency of drone counts in a list."""
     if not isinstance(drone_data, list): return {"total_drones": 0, "authorized": 0, "unauthorized": 0, "validation_passed": False}
     total_drones = len(drone_data)
-    authorized_count = sum(1 for d in drone_data if isinstance(d, dict) and d.get("unauthorized") is False) # Explicit check for False
-    unauthorized_count = sum(1 for d in drone_data if isinstance(d, dict) and d.get("unauthorized") is True) # Explicit check for True
+    # Single pass: one isinstance + one dict lookup per drone instead of two
+    # full generator sweeps
+    authorized_count = 0
+    unauthorized_count = 0
+    for d in drone_data:
+        if isinstance(d, dict):
+            status = d.get("unauthorized")
+            if status is True: # Explicit check for True
+                unauthorized_count += 1
+            elif status is False: # Explicit check for False
+                authorized_count += 1
     validation_passed = (authorized_count + unauthorized_count) == total_drones
     if not validation_passed and total_drones > 0:
         # More detailed warning
@@ -187,6 +459,57 @@ def validate_drone_counts(drone_data: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 # --- Email Sending Functions ---
 
+# Persistent SMTP connection: TLS handshake + AUTH against Gmail costs ~1-3s,
+# which used to be paid on every alert batch. The singleton is guarded by a
+# lock because senders run on executor threads.
+_smtp_lock = threading.Lock()
+_smtp_conn: Optional[smtplib.SMTP_SSL] = None
+
+def _get_smtp() -> smtplib.SMTP_SSL:
+    """Return a live, authenticated SMTP connection (caller holds _smtp_lock).
+
+    Reuses the cached connection when its NOOP probe succeeds; otherwise
+    reconnects lazily (Gmail drops idle connections after ~10 minutes, and the
+    per-cycle probe doubles as a keepalive)."""
+    global _smtp_conn
+    if _smtp_conn is not None:
+        try:
+            _smtp_conn.noop()
+            return _smtp_conn
+        except Exception:
+            logger.info("🔐 Cached SMTP connection went stale. Reconnecting...")
+            _drop_smtp_locked()
+    logger.info(f"🔐 Connecting to SMTP server (smtp.gmail.com:465) as {EMAIL_ADDRESS}...")
+    conn = smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=30)
+    conn.set_debuglevel(0) # 0 for less spam, 1 for debug
+    conn.ehlo()
+    login_response = conn.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+    logger.info(f"✅ SMTP login successful. Response Code: {login_response[0] if isinstance(login_response, tuple) else 'N/A'}")
+    _smtp_conn = conn
+    return conn
+
+def _drop_smtp_locked():
+    """Discard the cached connection (caller holds _smtp_lock)."""
+    global _smtp_conn
+    if _smtp_conn is not None:
+        try:
+            _smtp_conn.close()
+        except Exception:
+            pass
+        _smtp_conn = None
+
+@app.on_event("shutdown")
+async def shutdown_smtp():
+    """Politely QUIT the cached SMTP connection on server shutdown."""
+    global _smtp_conn
+    with _smtp_lock:
+        if _smtp_conn is not None:
+            try:
+                _smtp_conn.quit()
+            except Exception:
+                pass
+            _smtp_conn = None
+
 def send_alert_email(callsign: str, latitude: Optional[float], longitude: Optional[float], zone_name: Optional[str]):
     """Sends a single alert email (kept for testing)."""
     logger.info("📨 Preparing to send SINGLE alert email...")
@@ -202,33 +525,36 @@ def send_alert_email(callsign: str, latitude: Optional[float], longitude: Option
     body = ( f"An unauthorized drone has been detected!\n\n"
              f"🛸 Callsign: {callsign or 'Unknown'}\n📍 Location: Latitude {lat_str}, Longitude {lon_str}\n"
              f"🚫 Restricted Zone: {zone_name or 'Unknown'}\n\n🕒 Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-    msg = MIMEMultipart()
+    msg = EmailMessage()
     msg["From"], msg["To"], msg["Subject"] = EMAIL_ADDRESS, ALERT_EMAIL, subject
-    msg.attach(MIMEText(body, "plain"))
-    server = None
+    msg.set_content(body)
     try:
-        logger.info(f"🔐 Connecting to SMTP server (smtp.gmail.com:465) as {EMAIL_ADDRESS} (SINGLE)...")
-        server = smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=30)
-        logger.info("   Setting debug level to 0...")
-        server.set_debuglevel(0) # 0 for less spam, 1 for debug
-        logger.info("   Attempting EHLO/HELO...")
-        server.ehlo()
-        logger.info(f"   Attempting login for {EMAIL_ADDRESS}...")
-        login_response = server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-        logger.info(f"✅ Login successful. Response Code: {login_response[0] if isinstance(login_response, tuple) else 'N/A'}")
-        logger.info(f"   Attempting to send email to {ALERT_EMAIL}...")
-        send_response = server.send_message(msg)
+        with _smtp_lock:
+            server = _get_smtp()
+            logger.info(f"   Attempting to send email to {ALERT_EMAIL}...")
+            send_response = server.send_message(msg)
         logger.info(f"✅ Email sent successfully. Response: {send_response}")
-    except Exception as e: logger.error(f"❌ Error sending SINGLE email: {type(e).__name__} - {e}", exc_info=True)
+    except Exception as e:
+        logger.error(f"❌ Error sending SINGLE email: {type(e).__name__} - {e}", exc_info=True)
+        with _smtp_lock:
+            _drop_smtp_locked() # force a fresh connection next time
     finally:
-        if server:
-             try: server.quit()
-             except Exception as e: logger.warning(f"   Error closing SMTP connection (Single): {e}")
         logger.info("📨 Finished send_alert_email attempt.")
 
 
-def send_batched_alert_email(alerts: List[Dict[str, Any]]):
-    """Sends a single email summarizing multiple new alerts."""
+def render_alert_block(callsign: str, latitude: float, longitude: float, zone_name: Optional[str]) -> str:
+    """Render one alert's email lines at detection time.
+
+    The batch sender then only numbers and joins pre-built blocks instead of
+    re-walking a list of dicts and re-formatting every field per send."""
+    return (f"🛸 Callsign: {callsign}\n"
+            f"📍 Location: Lat {latitude:.4f}, Lon {longitude:.4f}\n"
+            f"🚫 Restricted Zone: {zone_name or 'Unknown'}\n")
+
+def send_batched_alert_email(alerts: List[str]):
+    """Sends a single email summarizing multiple new alerts.
+
+    `alerts` holds blocks pre-rendered by render_alert_block."""
     alert_count = len(alerts)
     if alert_count == 0:
         # logger.debug("No new alerts to send in this batch.") # Reduce noise
@@ -242,99 +568,95 @@ def send_batched_alert_email(alerts: List[Dict[str, Any]]):
     # --- Create Email Body ---
     subject = f"🚨 {alert_count} Unauthorized Drone Alert(s)"
     body_lines = [f"Detected {alert_count} new unauthorized drone flight(s):\n"]
-    for i, alert in enumerate(alerts):
-        callsign = alert.get('callsign', 'Unknown')
-        lat = alert.get('latitude', 'N/A')
-        lon = alert.get('longitude', 'N/A')
-        zone_name = alert.get('zone_name', 'Unknown')
-        lat_str = f"{lat:.4f}" if isinstance(lat, float) else str(lat)
-        lon_str = f"{lon:.4f}" if isinstance(lon, float) else str(lon)
+    for i, block in enumerate(alerts):
         body_lines.append(f"--- Alert {i+1} ---")
-        body_lines.append(f"🛸 Callsign: {callsign}")
-        body_lines.append(f"📍 Location: Lat {lat_str}, Lon {lon_str}")
-        body_lines.append(f"🚫 Restricted Zone: {zone_name}")
-        body_lines.append("")
+        body_lines.append(block)
     body_lines.append(f"\n🕒 Report Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     body = "\n".join(body_lines)
 
     # --- Setup Email Message ---
-    msg = MIMEMultipart()
+    # Single-part plain-text mail — EmailMessage skips the multipart
+    # container MIMEMultipart builds around a lone text body
+    msg = EmailMessage()
     msg["From"], msg["To"], msg["Subject"] = EMAIL_ADDRESS, ALERT_EMAIL, subject
-    msg.attach(MIMEText(body, "plain"))
+    msg.set_content(body)
 
     # --- Send Email ---
-    server = None
     try:
-        logger.info(f"🔐 Connecting to SMTP server (smtp.gmail.com:465) as {EMAIL_ADDRESS} for batch...")
-        # Use slightly longer timeout for potential batch operations
-        server = smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=45)
-        server.set_debuglevel(0) # 0 for production, 1 for detailed SMTP logs
-        server.ehlo()
-        logger.info(f"   Attempting batch login for {EMAIL_ADDRESS}...")
-        login_response = server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-        logger.info(f"✅ Batch Login successful. Response Code: {login_response[0] if isinstance(login_response, tuple) else 'N/A'}")
-        logger.info(f"   Attempting to send batched email to {ALERT_EMAIL}...")
-        send_response = server.send_message(msg) # Response is usually {} on success
+        with _smtp_lock:
+            server = _get_smtp()
+            logger.info(f"   Attempting to send batched email to {ALERT_EMAIL}...")
+            send_response = server.send_message(msg) # Response is usually {} on success
         logger.info(f"✅ Batched email sent successfully. Response: {send_response}")
     except Exception as e:
         logger.error(f"❌ Error sending BATCHED email: {type(e).__name__} - {e}", exc_info=True)
+        with _smtp_lock:
+            _drop_smtp_locked() # force a fresh connection next time
     finally:
-        if server:
-            try:
-                logger.info("   Closing SMTP connection (Batch)...")
-                server.quit()
-            except smtplib.SMTPServerDisconnected:
-                 logger.warning("   SMTP server already disconnected before quit (Batch).")
-            except Exception as e:
-                 logger.warning(f"   Error closing SMTP connection (Batch): {e}")
         logger.info("📨 Finished send_batched_alert_email attempt.")
 
 
 # --- Core Data Fetching and Processing ---
 
-def fetch_opensky_data() -> Dict[str, Any]:
+# Conditional-request state: OpenSky answers 304 Not Modified on a matching
+# ETag, which skips the multi-MB payload transfer and decode on idle cycles.
+_last_etag: Optional[str] = None
+_last_packet: Optional[Dict[str, Any]] = None
+
+async def fetch_opensky_data() -> Dict[str, Any]:
     """
     Fetches drone data from OpenSky API or simulates data if API fails.
     Processes data, checks restricted zones, and prepares for batch alerts.
-    NOTE: This is a SYNCHRONOUS function, intended to be run in an executor.
+    Runs as a coroutine on the event loop; the HTTP fetch shares the pooled
+    aiohttp session, and the processing below is brief once vectorized.
     """
-    logger.info("====== fetch_opensky_data START ======") # LOG START
+    global _last_etag, _last_packet
+    logger.debug("====== fetch_opensky_data START ======") # LOG START
     flights: Optional[List[List[Any]]] = None
     api_source = "OpenSky API" # Track data source
 
     # --- Step 1: Fetch Raw Data ---
     try:
-        logger.info("Attempting OpenSky API fetch...")
-        response = requests.get(OPENSKY_URL, timeout=15) # Reasonable timeout
-        if response.status_code == 429:
-            logger.warning("❌ OpenSky API request blocked: 429 Too Many Requests. Using simulation.")
-            flights = [] # Indicate simulation needed
-            api_source = "Simulation (429)"
-        elif response.status_code == 204: # Handle No Content explicitly
-             logger.info("OpenSky API returned 204 No Content. No states available currently.")
-             flights = [] # Treat as no data, might not need simulation depending on requirements
-             api_source = "OpenSky API (204)" # Or maybe still trigger simulation? You decide.
-        else:
-            response.raise_for_status() # Raise HTTPError for other bad responses (4xx, 5xx)
-            raw_data = response.json()
-            # Check if 'states' key exists and is a list
-            if isinstance(raw_data, dict) and isinstance(raw_data.get("states"), list):
-                flights = raw_data["states"]
-                logger.info(f"OpenSky fetch SUCCESS, {len(flights)} states received.")
+        logger.debug("Attempting OpenSky API fetch...")
+        conditional_headers = {"If-None-Match": _last_etag} if _last_etag else None
+        async with app.state.http.get(OPENSKY_URL, headers=conditional_headers) as response:
+            if response.status == 304 and _last_packet is not None:
+                # Nothing changed upstream — skip transfer, decode, and reprocessing
+                logger.debug("OpenSky returned 304 Not Modified. Reusing previous packet.")
+                return _last_packet
+            if response.status == 429:
+                logger.warning("❌ OpenSky API request blocked: 429 Too Many Requests. Using simulation.")
+                flights = [] # Indicate simulation needed
+                api_source = "Simulation (429)"
+            elif response.status == 204: # Handle No Content explicitly
+                 logger.info("OpenSky API returned 204 No Content. No states available currently.")
+                 flights = [] # Treat as no data, might not need simulation depending on requirements
+                 api_source = "OpenSky API (204)" # Or maybe still trigger simulation? You decide.
             else:
-                logger.warning(f"OpenSky response format unexpected or 'states' is not a list. Response: {raw_data}. Using simulation.")
-                flights = []
-                api_source = "Simulation (Bad Format)"
+                response.raise_for_status() # Raise for other bad responses (4xx, 5xx)
+                # orjson parses the ~30 MB states payload several times faster
+                # than stdlib json; read the raw bytes and decode off aiohttp's
+                # default json path.
+                raw_data = orjson.loads(await response.read())
+                # Check if 'states' key exists and is a list
+                if isinstance(raw_data, dict) and isinstance(raw_data.get("states"), list):
+                    flights = raw_data["states"]
+                    _last_etag = response.headers.get("ETag")
+                    logger.info("OpenSky fetch SUCCESS, %d states received.", len(flights))
+                else:
+                    logger.warning("OpenSky response format unexpected or 'states' is not a list. Response: %.200s. Using simulation.", raw_data)
+                    flights = []
+                    api_source = "Simulation (Bad Format)"
 
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         logger.error("❌ OpenSky API request timed out. Using simulation.")
         flights = []
         api_source = "Simulation (Timeout)"
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         logger.error(f"❌ OpenSky API request error: {e}. Using simulation.")
         flights = [] # Ensure flights is list
         api_source = f"Simulation (Request Error: {type(e).__name__})"
-    except json.JSONDecodeError as e:
+    except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
         logger.error(f"❌ OpenSky API JSON decode error: {e}. Using simulation.", exc_info=True)
         flights = []
         api_source = "Simulation (JSON Error)"
@@ -345,34 +667,51 @@ def fetch_opensky_data() -> Dict[str, Any]:
 
     # --- Step 2: Structure and Process Flights (Real or Simulated) ---
     structured_flights: List[Dict[str, Any]] = []
-    current_time: float = time.time()
-    alerts_to_batch_this_run: List[Dict[str, Any]] = []
+    current_time: float = time.monotonic()
+    alerts_to_batch_this_run: List[str] = []  # pre-rendered email blocks
 
     if flights: # Process real flights if API returned data
-        logger.debug(f"Processing {len(flights)} real flight states...")
-        for state in flights:
-            if not isinstance(state, list) or len(state) < 14: continue # Basic validation
-
-            # Extract data safely, providing None as default
-            callsign = str(state[1]).strip() if state[1] else None # Ensure string, handle empty
-            longitude = float(state[5]) if isinstance(state[5], (float, int)) else None
-            latitude = float(state[6]) if isinstance(state[6], (float, int)) else None
-            velocity = float(state[9]) if isinstance(state[9], (float, int)) else None # meters/sec
-            geo_altitude = float(state[13]) if isinstance(state[13], (float, int)) else None # meters
-            baro_altitude = float(state[7]) if isinstance(state[7], (float, int)) else None # meters
-
-            # Skip if essential data missing for mapping/checking
-            if not callsign or latitude is None or longitude is None:
-                logger.debug(f"Skipping state due to missing callsign/lat/lon: {state}")
-                continue
-
-            # Choose altitude (prefer geometric)
-            altitude_m = geo_altitude if geo_altitude is not None else baro_altitude
-            # Convert velocity from m/s to km/h (approx) if available
-            velocity_kmh = (velocity * 3.6) if velocity is not None else 0
-
-            # Check authorization status
-            unauthorized, zone_name = is_unauthorized_flight(latitude, longitude)
+        logger.debug("Processing %d real flight states...", len(flights))
+
+        # Phase 1: AoS -> SoA — slice the state vectors into typed columns
+        # once instead of running 7 isinstance/float coercions per row
+        rows = [s for s in flights if isinstance(s, list) and len(s) >= 14]
+        n_rows = len(rows)
+        callsigns = [str(s[1]).strip() if s[1] else "" for s in rows]
+        lons = np.array([s[5] if isinstance(s[5], (int, float)) else np.nan for s in rows], dtype=np.float64)
+        lats = np.array([s[6] if isinstance(s[6], (int, float)) else np.nan for s in rows], dtype=np.float64)
+        velocities = np.array([s[9] if isinstance(s[9], (int, float)) else np.nan for s in rows], dtype=np.float64) # meters/sec
+        geo_alts = np.array([s[13] if isinstance(s[13], (int, float)) else np.nan for s in rows], dtype=np.float64) # meters
+        baro_alts = np.array([s[7] if isinstance(s[7], (int, float)) else np.nan for s in rows], dtype=np.float64) # meters
+
+        # Vectorized derived columns: prefer geometric altitude, m/s -> km/h
+        altitudes = np.where(np.isnan(geo_alts), baro_alts, geo_alts)
+        velocities_kmh = np.where(np.isnan(velocities), 0.0, velocities * 3.6)
+
+        # Keep only rows with a callsign and usable coordinates (isfinite also
+        # rejects the occasional inf that sneaks into raw state vectors)
+        has_callsign = np.fromiter((bool(c) for c in callsigns), dtype=bool, count=n_rows) if n_rows else np.zeros(0, dtype=bool)
+        valid = has_callsign & np.isfinite(lats) & np.isfinite(lons)
+        valid_idx = np.nonzero(valid)[0]
+        dropped = n_rows - valid_idx.size
+        if dropped:
+            logger.debug("Skipped %d states due to missing callsign/lat/lon.", dropped)
+
+        # Phase 2: one broadcast zone check across the whole surviving batch
+        # instead of N_drones × N_zones scalar haversine calls
+        if valid_idx.size:
+            unauth_mask, zone_idx = check_zones_bulk(lats[valid_idx], lons[valid_idx])
+
+        # Phase 3: materialize dicts only for surviving rows, plus DB logging
+        # and alert batching
+        for j, i in enumerate(valid_idx):
+            callsign = callsigns[i]
+            latitude = float(lats[i])
+            longitude = float(lons[i])
+            altitude_m = float(altitudes[i]) if not np.isnan(altitudes[i]) else None
+            velocity_kmh = float(velocities_kmh[i])
+            unauthorized = bool(unauth_mask[j])
+            zone_name = _ZONE_NAMES[int(zone_idx[j])] if unauthorized else None
 
             # Structure data for frontend/DB
             drone_data: Dict[str, Any] = {
@@ -383,7 +722,6 @@ def fetch_opensky_data() -> Dict[str, Any]:
                 "velocity": round(velocity_kmh, 1), # Use km/h rounded
                 "unauthorized": unauthorized,
                 "zone": zone_name,
-                "source": api_source # Add source info
             }
             structured_flights.append(drone_data)
 
@@ -395,79 +733,91 @@ def fetch_opensky_data() -> Dict[str, Any]:
                     logger.error(f"Error logging drone {callsign} to DB: {db_err}", exc_info=False) # Avoid excessive logs
 
             # Check alert cooldown and add to batch if newly unauthorized
-            if unauthorized:
-                last_alert_time = ALERTED_DRONES.get(callsign)
-                if last_alert_time is None or (current_time - last_alert_time) > ALERT_COOLDOWN:
-                    logger.info(f"ALERT: Unauthorized drone {callsign} in {zone_name}. Adding to alert batch.")
-                    alerts_to_batch_this_run.append({
-                        "callsign": callsign, "latitude": latitude, "longitude": longitude, "zone_name": zone_name
-                    })
-                    ALERTED_DRONES[callsign] = current_time # Update cooldown timestamp
-                else:
-                    logger.debug(f"Unauthorized drone {callsign} in {zone_name} still within cooldown ({current_time - last_alert_time:.0f}s < {ALERT_COOLDOWN}s).")
+            if unauthorized and await _should_alert(callsign, zone_name, current_time):
+                logger.info("ALERT: Unauthorized drone %s in %s. Adding to alert batch.", callsign, zone_name)
+                alerts_to_batch_this_run.append(
+                    render_alert_block(callsign, latitude, longitude, zone_name)
+                )
 
     # --- Step 3: Simulate Data if API Failed or Returned No Data ---
     # Decide if simulation should run even on API 204 No Content - currently yes
     if not flights: # This condition is true if flights is [] or was never assigned (due to error)
-        logger.info(f">>> ENTERING SIMULATION BLOCK (Reason: {api_source}) <<<")
+        logger.debug(">>> ENTERING SIMULATION BLOCK (Reason: %s) <<<", api_source)
+        rng = np.random.default_rng()
         sim_auth_count = 0
         sim_unauth_count = 0
-        attempts_auth = 0
-        target_auth_sim = random.randint(25, 50) # Simulate more drones generally
-        target_unauth_sim = random.randint(5, 10) # Ensure some unauthorized ones
-
-        # Simulate AUTHORIZED drones
-        while sim_auth_count < target_auth_sim and attempts_auth < 500: # Increased attempts limit
-             attempts_auth += 1
-             lat = random.uniform(CONUS_BOUNDS["lat_min"], CONUS_BOUNDS["lat_max"])
-             lon = random.uniform(CONUS_BOUNDS["lon_min"], CONUS_BOUNDS["lon_max"])
-             is_unauth_sim_check, _ = is_unauthorized_flight(lat, lon)
-             if not is_unauth_sim_check:
-                 sim_callsign = f"SIM-A-{random.randint(1000, 9999)}" # More varied callsigns
-                 sim_drone_data = {
-                    "callsign": sim_callsign,
-                    "latitude": round(lat, 6), "longitude": round(lon, 6),
-                    "altitude": random.randint(300, 5000), # Meters
-                    "velocity": random.randint(50, 300), # km/h
-                    "unauthorized": False, "zone": None, "source": api_source
-                 }
-                 structured_flights.append(sim_drone_data)
-                 # Log simulated authorized drone to DB (Expanded block)
-                 if DRONE_DB_ENABLED:
-                     try:
-                         log_drone(sim_drone_data)
-                     except Exception as db_log_err:
-                         # Log a warning instead of passing silently, avoid full traceback unless needed
-                         logger.warning(f"DB Log failed (Sim-Auth: {sim_drone_data.get('callsign', 'N/A')}): {db_log_err}", exc_info=False)
-                 sim_auth_count += 1
-
-        # Simulate UNAUTHORIZED drones
-        if RESTRICTED_ZONES: # Check if zones exist
-            for i in range(target_unauth_sim):
-                 zone = random.choice(RESTRICTED_ZONES)
-                 # Simulate slightly inside or just outside the radius
-                 radius_factor = random.uniform(0.7, 1.0) # Mostly inside zone radius
-                 angle = random.uniform(0, 2 * 3.14159)
-                 # Convert radius (km) to approx degrees (rough)
-                 dist_deg = (zone['radius'] * radius_factor) / 111.0
-                 lat = zone["latitude"] + dist_deg * cos(angle)
-                 lon = zone["longitude"] + dist_deg * sin(angle) / cos(radians(zone["latitude"]))
-                 # Clamp to CONUS bounds
-                 lat = max(CONUS_BOUNDS["lat_min"], min(CONUS_BOUNDS["lat_max"], lat))
-                 lon = max(CONUS_BOUNDS["lon_min"], min(CONUS_BOUNDS["lon_max"], lon))
-                 # Re-check if the *simulated* point is in *any* zone
-                 is_unauth_sim, zone_name_sim = is_unauthorized_flight(lat, lon)
-                 sim_unauth_callsign = f"SIM-U-{random.randint(100, 999)}"
+        target_auth_sim = int(rng.integers(25, 51)) # Simulate more drones generally
+        target_unauth_sim = int(rng.integers(5, 11)) # Ensure some unauthorized ones
+
+        # Simulate AUTHORIZED drones — all random draws batched in one call each
+        if _SAFE_CELLS:
+            cells = np.asarray(_SAFE_CELLS, dtype=np.float64)
+            picks = rng.integers(0, len(_SAFE_CELLS), size=target_auth_sim)
+            auth_lats = cells[picks, 0] + rng.random(target_auth_sim)
+            auth_lons = cells[picks, 1] + rng.random(target_auth_sim)
+        else:
+            # Vectorized rejection sampling: draw a block, keep authorized points
+            cand_lats = rng.uniform(CONUS_BOUNDS["lat_min"], CONUS_BOUNDS["lat_max"], size=500)
+            cand_lons = rng.uniform(CONUS_BOUNDS["lon_min"], CONUS_BOUNDS["lon_max"], size=500)
+            cand_unauth, _ = check_zones_bulk(cand_lats, cand_lons)
+            keep = np.nonzero(~cand_unauth)[0][:target_auth_sim]
+            auth_lats, auth_lons = cand_lats[keep], cand_lons[keep]
+        auth_alts = rng.integers(300, 5001, size=auth_lats.size) # Meters
+        auth_vels = rng.integers(50, 301, size=auth_lats.size) # km/h
+        auth_ids = rng.integers(1000, 10000, size=auth_lats.size) # More varied callsigns
+
+        for k in range(auth_lats.size):
+             sim_drone_data = {
+                "callsign": f"SIM-A-{auth_ids[k]}",
+                "latitude": round(float(auth_lats[k]), 6), "longitude": round(float(auth_lons[k]), 6),
+                "altitude": int(auth_alts[k]),
+                "velocity": int(auth_vels[k]),
+                "unauthorized": False, "zone": None
+             }
+             structured_flights.append(sim_drone_data)
+             # Log simulated authorized drone to DB (Expanded block)
+             if DRONE_DB_ENABLED:
+                 try:
+                     log_drone(sim_drone_data)
+                 except Exception as db_log_err:
+                     # Log a warning instead of passing silently, avoid full traceback unless needed
+                     logger.warning(f"DB Log failed (Sim-Auth: {sim_drone_data.get('callsign', 'N/A')}): {db_log_err}", exc_info=False)
+             sim_auth_count += 1
+
+        # Simulate UNAUTHORIZED drones — offsets around random zones, vectorized
+        if _ZONE_NAMES: # Check if (valid) zones exist
+            zone_picks = rng.integers(0, len(_ZONE_NAMES), size=target_unauth_sim)
+            # Simulate slightly inside or just outside the radius
+            radius_factors = rng.uniform(0.7, 1.0, size=target_unauth_sim) # Mostly inside zone radius
+            angles = rng.uniform(0, 2 * np.pi, size=target_unauth_sim)
+            # Convert radius (km) to approx degrees (rough)
+            dist_deg = (_ZONES_RADIUS[zone_picks] * radius_factors) / 111.0
+            unauth_lats = np.degrees(_ZONES_LAT[zone_picks]) + dist_deg * np.cos(angles)
+            unauth_lons = np.degrees(_ZONES_LON[zone_picks]) + dist_deg * np.sin(angles) / _ZONES_COS_LAT[zone_picks]
+            # Clamp to CONUS bounds
+            unauth_lats = np.clip(unauth_lats, CONUS_BOUNDS["lat_min"], CONUS_BOUNDS["lat_max"])
+            unauth_lons = np.clip(unauth_lons, CONUS_BOUNDS["lon_min"], CONUS_BOUNDS["lon_max"])
+            # Re-check whether each *simulated* point is in *any* zone
+            unauth_flags, unauth_zone_idx = check_zones_bulk(unauth_lats, unauth_lons)
+            unauth_alts = rng.integers(50, 1501, size=target_unauth_sim) # Lower altitude typical
+            unauth_vels = rng.integers(30, 151, size=target_unauth_sim) # Slower typical
+            unauth_ids = rng.integers(100, 1000, size=target_unauth_sim)
+
+            for k in range(target_unauth_sim):
+                 lat = float(unauth_lats[k])
+                 lon = float(unauth_lons[k])
+                 is_unauth_sim = bool(unauth_flags[k])
+                 zone_name_sim = _ZONE_NAMES[int(unauth_zone_idx[k])] if is_unauth_sim else None
+                 sim_unauth_callsign = f"SIM-U-{unauth_ids[k]}"
 
                  # Ensure it's flagged as unauthorized if check passes
                  sim_drone_data = {
                     "callsign": sim_unauth_callsign,
                     "latitude": round(lat, 6), "longitude": round(lon, 6),
-                    "altitude": random.randint(50, 1500), # Lower altitude typical
-                    "velocity": random.randint(30, 150), # Slower typical
+                    "altitude": int(unauth_alts[k]),
+                    "velocity": int(unauth_vels[k]),
                     "unauthorized": is_unauth_sim, # Use result of check
-                    "zone": zone_name_sim if is_unauth_sim else None,
-                    "source": api_source
+                    "zone": zone_name_sim,
                  }
                  structured_flights.append(sim_drone_data)
                  # Log simulated unauthorized drone to DB (Expanded block)
@@ -480,36 +830,51 @@ def fetch_opensky_data() -> Dict[str, Any]:
                  sim_unauth_count += 1 if is_unauth_sim else 0
 
                  # Add to batch if simulated as unauthorized and not on cooldown
-                 if is_unauth_sim:
-                     last_alert_time = ALERTED_DRONES.get(sim_unauth_callsign)
-                     if last_alert_time is None or (current_time - last_alert_time) > ALERT_COOLDOWN:
-                         logger.info(f"ALERT: Simulated unauthorized drone {sim_unauth_callsign} in {zone_name_sim}. Adding to alert batch.")
-                         alerts_to_batch_this_run.append({
-                             "callsign": sim_unauth_callsign, "latitude": lat, "longitude": lon, "zone_name": zone_name_sim
-                         })
-                         ALERTED_DRONES[sim_unauth_callsign] = current_time
-                     # else: logger.debug(f"Simulated unauth {sim_unauth_callsign} within cooldown.")
+                 if is_unauth_sim and await _should_alert(sim_unauth_callsign, zone_name_sim, current_time):
+                     logger.info("ALERT: Simulated unauthorized drone %s in %s. Adding to alert batch.", sim_unauth_callsign, zone_name_sim)
+                     alerts_to_batch_this_run.append(
+                         render_alert_block(sim_unauth_callsign, lat, lon, zone_name_sim)
+                     )
         else:
              logger.warning("Cannot simulate unauthorized drones, RESTRICTED_ZONES list is empty.")
 
-        logger.info(f"<<< EXITED SIMULATION BLOCK - Added {sim_auth_count} auth, {sim_unauth_count} unauth >>>")
+        logger.debug("<<< EXITED SIMULATION BLOCK - Added %d auth, %d unauth >>>", sim_auth_count, sim_unauth_count)
 
     # --- Step 4: Clean up Alert Cooldown Cache ---
-    expired_drones = [cs for cs, ts in ALERTED_DRONES.items() if (current_time - ts) > ALERT_COOLDOWN]
-    if expired_drones:
-        logger.debug(f"Removing {len(expired_drones)} expired drones from alert cache: {', '.join(expired_drones)}")
-        for cs in expired_drones:
-            if cs in ALERTED_DRONES: del ALERTED_DRONES[cs]
-
-    # --- Step 5: Send Batched Email (if new alerts occurred) ---
+    # Pop only entries actually due; refreshed callsigns leave stale heap
+    # items behind, which the timestamp re-check skips harmlessly.
+    expired_count = 0
+    while _ALERT_HEAP and _ALERT_HEAP[0][0] <= current_time:
+        _, cs = heapq.heappop(_ALERT_HEAP)
+        ts = ALERTED_DRONES.get(cs)
+        if ts is not None and (current_time - ts) > ALERT_COOLDOWN:
+            del ALERTED_DRONES[cs]
+            expired_count += 1
+    if expired_count:
+        logger.debug("Removed %d expired drones from alert cache.", expired_count)
+
+    # --- Step 5: Queue Batched Email (if new alerts occurred) ---
     if alerts_to_batch_this_run:
-        logger.info(f"Attempting to send batch email for {len(alerts_to_batch_this_run)} new alerts...")
+        logger.info("Queueing batch email for %d new alerts...", len(alerts_to_batch_this_run))
         try:
-            # Running email sending synchronously within the executor thread is acceptable here,
-            # as the entire fetch_opensky_data function runs off the main event loop.
-            send_batched_alert_email(alerts_to_batch_this_run)
+            if ALERT_QUEUE is not None:
+                # Hand off to the background worker; the fetch cycle no longer
+                # waits out the SMTP round-trip.
+                try:
+                    ALERT_QUEUE.put_nowait(alerts_to_batch_this_run)
+                except asyncio.QueueFull:
+                    # SMTP has been stalled for ~100 cycles; shed load rather
+                    # than accumulate batches forever
+                    logger.warning("Alert queue full; dropping batch of %d alert(s).",
+                                   len(alerts_to_batch_this_run))
+            else:
+                # Startup hook hasn't run (e.g. direct invocation) — push the
+                # blocking send to a thread so the loop stays free
+                asyncio.get_running_loop().run_in_executor(
+                    None, send_batched_alert_email, alerts_to_batch_this_run
+                )
         except Exception as email_err:
-            logger.error(f"Error occurred during call to send_batched_alert_email: {email_err}", exc_info=True)
+            logger.error(f"Error queueing batched alert email: {email_err}", exc_info=True)
     else:
         logger.debug("No new off-cooldown unauthorized drones found in this cycle. No batch email needed.")
 
@@ -517,9 +882,122 @@ def fetch_opensky_data() -> Dict[str, Any]:
     validation_result = validate_drone_counts(structured_flights)
     total_processed = validation_result.get('total_drones', 0)
     unauthorized_count = validation_result.get('unauthorized', 0)
-    logger.info(f"Processed data: Total={total_processed}, Unauthorized={unauthorized_count}, Validation OK={validation_result.get('validation_passed', False)}")
-    logger.info(f"====== fetch_opensky_data END - Returning {len(structured_flights)} drones (Source: {api_source}) ======") # LOG END + RESULT
-    return {"drones": structured_flights, "validation": validation_result}
+    logger.info("Processed data: Total=%d, Unauthorized=%d, Validation OK=%s",
+                total_processed, unauthorized_count, validation_result.get('validation_passed', False))
+    logger.debug("====== fetch_opensky_data END - Returning %d drones (Source: %s) ======",
+                 len(structured_flights), api_source) # LOG END + RESULT
+    # Source is identical for every drone in a cycle — carry it once at packet
+    # level instead of repeating the string per drone on the wire
+    _last_packet = {"drones": structured_flights, "validation": validation_result, "source": api_source}
+    return _last_packet
+
+# --- Shared Fetch Cache ---
+
+# With N WebSocket clients each looping independently, OpenSky would be hit
+# N times per interval and the processing redone N times. All callers instead
+# share one in-flight fetch task, and results stay fresh for a short TTL.
+FETCH_TTL = 5.0 # seconds a completed fetch result remains reusable
+_fetch_lock = asyncio.Lock()
+_fetch_task: Optional[asyncio.Task] = None
+_fetch_ts: float = 0.0
+
+async def get_shared_drone_data() -> Dict[str, Any]:
+    """Return the latest drone packet, coalescing concurrent fetches.
+
+    If a fetch is in flight, await it; if the last one finished within
+    FETCH_TTL seconds, reuse its result; otherwise start a new fetch task.
+    """
+    global _fetch_task, _fetch_ts
+    async with _fetch_lock:
+        if _fetch_task is not None:
+            if not _fetch_task.done():
+                task = _fetch_task
+            elif (time.time() - _fetch_ts) < FETCH_TTL and not _fetch_task.cancelled() and _fetch_task.exception() is None:
+                return _fetch_task.result()
+            else:
+                task = None
+        else:
+            task = None
+        if task is None:
+            _fetch_task = task = asyncio.create_task(fetch_opensky_data())
+            _fetch_ts = time.time()
+    result = await asyncio.shield(task)
+    _fetch_ts = time.time()
+    return result
+
+# Encoded-payload cache: all WebSocket clients receive the same snapshot, so
+# serialize it once per packet instead of once per client. The strong
+# reference to the source dict makes the identity check safe against id reuse.
+_encoded_src: Optional[Dict[str, Any]] = None
+_encoded_bytes: bytes = b""
+
+def encode_shared_packet(packet: Dict[str, Any]) -> bytes:
+    """Return the orjson encoding of `packet`, reusing the cached bytes when
+    the same packet object is broadcast to multiple clients."""
+    global _encoded_src, _encoded_bytes
+    if packet is not _encoded_src:
+        _encoded_bytes = orjson.dumps(packet, option=orjson.OPT_SERIALIZE_NUMPY)
+        _encoded_src = packet
+    return _encoded_bytes
+
+# --- Broadcast Producer ---
+
+# One producer task drives the fetch cadence for every WebSocket client and
+# pushes the encoded packet to all of them concurrently, so OpenSky sees one
+# call per interval no matter how many (or how staggered) the connections are.
+BROADCAST_INTERVAL = 60 # seconds between fetch cycles
+_broadcast_packet: Optional[Dict[str, Any]] = None
+active_connections: set = set()
+
+async def _broadcast(payload: bytes):
+    """Fan the payload out to every connected client concurrently; connections
+    that fail to accept the write are dropped from the set."""
+    conns = list(active_connections)
+    # Build the ASGI message once and pass it straight to WebSocket.send —
+    # send_bytes would allocate this identical dict per connection. Safe to
+    # share: the server send path only reads it.
+    message = {"type": "websocket.send", "bytes": payload}
+    results = await asyncio.gather(
+        *(ws.send(message) for ws in conns), return_exceptions=True
+    )
+    for ws, result in zip(conns, results):
+        if isinstance(result, BaseException):
+            active_connections.discard(ws)
+            logger.warning("Dropping WebSocket client after failed send: %s", result)
+
+async def drone_feed_producer():
+    """Fetch, cache, and broadcast a fresh packet every BROADCAST_INTERVAL.
+
+    Scheduled against absolute deadlines: a cycle that takes 8s sleeps 52s,
+    keeping the cadence fixed instead of drifting by the work time."""
+    global _broadcast_packet
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+    while True:
+        try:
+            packet = await get_shared_drone_data()
+            _broadcast_packet = packet
+            payload = encode_shared_packet(packet) # one encode per cycle
+            drones = packet.get('drones', [])
+            logger.info("Broadcasting packet: %d drones (%d unauth) to %d client(s)",
+                        len(drones),
+                        packet.get('validation', {}).get('unauthorized', 0),
+                        len(active_connections))
+            if active_connections:
+                await _broadcast(payload)
+        except Exception as e:
+            logger.error(f"Drone feed producer cycle failed: {e}", exc_info=True)
+        deadline += BROADCAST_INTERVAL
+        if deadline <= loop.time():
+            # Cycle overran a whole interval — rebase rather than burst-send
+            # catch-up packets back to back
+            deadline = loop.time() + BROADCAST_INTERVAL
+        await asyncio.sleep(deadline - loop.time())
+
+@app.on_event("startup")
+async def startup_feed_producer():
+    """Start the broadcast producer task on the running loop."""
+    asyncio.create_task(drone_feed_producer())
 
 # --- WebSocket Endpoint ---
 
@@ -532,67 +1010,31 @@ async def websocket_endpoint(websocket: WebSocket):
     client_id = f"{client_host}:{client_port}"
     logger.info(f"✅ WebSocket client connected: {client_id}")
 
-    # Optional: Manage multiple connections if needed later
-    # active_connections.add(websocket)
-
-    loop_count = 0
     try:
+        # Immediate first paint from the producer's cached packet (or one
+        # shared fetch if the producer hasn't completed a cycle yet), then
+        # register for broadcast pushes — the producer fans packets out to
+        # every registered connection concurrently.
+        drone_data_packet = _broadcast_packet
+        if drone_data_packet is None:
+            drone_data_packet = await get_shared_drone_data()
+        await websocket.send_bytes(encode_shared_packet(drone_data_packet))
+        active_connections.add(websocket)
+
+        # Park until the client disconnects; inbound frames are ignored but
+        # receiving is what surfaces the disconnect
         while True:
-            loop_count += 1
-            logger.info(f"[{client_id}] ---> WebSocket Loop Start - Iteration {loop_count} <---") # LOG START
-
-            logger.debug(f"[{client_id}] Calling fetch_opensky_data in executor...")
-            # Get the current running event loop
-            loop = asyncio.get_running_loop()
-            # Run the synchronous fetch_opensky_data function in a separate thread
-            # to avoid blocking the main asyncio event loop.
-            drone_data_packet = await loop.run_in_executor(None, fetch_opensky_data)
-            logger.debug(f"[{client_id}] fetch_opensky_data returned.")
-
-            # Log details before sending
-            drones_count = len(drone_data_packet.get('drones', []))
-            unauth_count = drone_data_packet.get('validation', {}).get('unauthorized', 0)
-            source = "Unknown"
-            if drones_count > 0:
-                source = drone_data_packet['drones'][0].get('source', 'Unknown')
-            logger.info(f"[{client_id}] Preparing to send packet: {drones_count} drones ({unauth_count} unauth). Source: {source}")
-
-            # Optional: Log a small sample of data
-            if drones_count > 0 and LOG_LEVEL == logging.DEBUG:
-                sample_drone = drone_data_packet['drones'][0]
-                logger.debug(f"[{client_id}] Sample drone[0]: CS={sample_drone.get('callsign')}, "
-                             f"Lat={sample_drone.get('latitude'):.4f}, Lon={sample_drone.get('longitude'):.4f}, "
-                             f"Unauth={sample_drone.get('unauthorized')}")
-
-            try:
-                # Send the JSON data packet as text
-                await websocket.send_text(json.dumps(drone_data_packet))
-                logger.debug(f"[{client_id}] Packet sent successfully.") # LOG AFTER SEND
-
-            except WebSocketDisconnect:
-                logger.warning(f"[{client_id}] WebSocket disconnected during send attempt. Exiting loop.")
-                break # Exit loop if cannot send
-            except Exception as send_err:
-                logger.error(f"[{client_id}] Error sending data over WebSocket: {send_err}", exc_info=True)
-                # Depending on the error, you might want to break or try again
-                break # Assume connection is unstable
-
-            # --- Sleep before next cycle ---
-            # Adjust sleep duration as needed
-            # 60 seconds is reasonable for API limits and UI updates
-            sleep_duration = 60
-            logger.info(f"[{client_id}] ---> WebSocket Loop End - Iteration {loop_count}. Sleeping for {sleep_duration}s... <---") # LOG END + SLEEP
-            await asyncio.sleep(sleep_duration)
+            await websocket.receive_text()
 
     except WebSocketDisconnect as e:
-        logger.warning(f"WebSocket client {client_id} disconnected cleanly. Code: {e.code}, Reason: {e.reason}")
+        logger.info(f"WebSocket client {client_id} disconnected. Code: {e.code}, Reason: {e.reason}")
     except asyncio.CancelledError:
         logger.info(f"WebSocket task for {client_id} was cancelled (likely server shutdown).")
-    except RuntimeError as e:
-        if "Cannot call 'send' after connection is closed" in str(e):
-            logger.warning(f"[{client_id}] Attempted send on closed WebSocket connection (RuntimeError).")
-        else:
-            logger.error(f"[{client_id}] Unexpected RuntimeError in WebSocket endpoint: {e}", exc_info=True)
+    except (RuntimeError, OSError) as e:
+        # Expected connection-teardown noise (send on closed socket, reset
+        # peer); don't pay for a traceback capture per dropped client
+        logger.warning("[%s] Connection error in WebSocket endpoint: %s: %s",
+                       client_id, type(e).__name__, e)
     except Exception as e:
         logger.error(f"[{client_id}] Unexpected error in WebSocket endpoint: {type(e).__name__} - {e}", exc_info=True)
         try:
@@ -601,50 +1043,71 @@ async def websocket_endpoint(websocket: WebSocket):
         except Exception as close_err:
              logger.error(f"[{client_id}] Error trying to close WebSocket after exception: {close_err}")
     finally:
+        active_connections.discard(websocket)
         logger.info(f"⛔ WebSocket connection handling finished for {client_id}.")
-        # Optional: Clean up connection if managing multiple
-        # if websocket in active_connections:
-        #     active_connections.remove(websocket)
 
 
 # --- REST API Endpoints ---
 
 @app.get("/restricted-zones")
-async def get_restricted_zones() -> Dict[str, List[Dict[str, Any]]]:
-    """Returns the list of defined restricted zones."""
+async def get_restricted_zones(request: Request) -> Response:
+    """Returns the list of defined restricted zones (pre-serialized).
+
+    Static config: revalidating clients get an empty 304, everyone else gets
+    the cached body with an ETag and a short browser-cache window."""
     logger.debug("GET /restricted-zones request received.")
-    return {"restricted_zones": RESTRICTED_ZONES}
+    if request.headers.get("if-none-match") == _RESTRICTED_ZONES_ETAG:
+        return Response(status_code=304)
+    return Response(
+        content=_RESTRICTED_ZONES_JSON,
+        media_type="application/json",
+        headers={"ETag": _RESTRICTED_ZONES_ETAG, "Cache-Control": "public, max-age=300"},
+    )
 
 # REST endpoint to trigger fetch_opensky_data manually (useful for initial load or testing)
 @app.get("/fetch-drones-live")
-async def get_drones_live() -> Dict[str, Any]:
+async def get_drones_live() -> ORJSONResponse:
      """
      Manually trigger the data fetching/processing logic via REST GET.
-     Runs the core logic in an executor to avoid blocking.
      """
      logger.info("Manual fetch endpoint '/fetch-drones-live' triggered.")
-     loop = asyncio.get_running_loop()
-     # Use run_in_executor because fetch_opensky_data is sync and does I/O
-     drone_data_packet = await loop.run_in_executor(None, fetch_opensky_data)
+     # Singleflight: concurrent manual triggers share one fetch instead of
+     # each hitting OpenSky (and its rate limit) separately
+     drone_data_packet = await get_shared_drone_data()
      logger.info("Manual fetch '/fetch-drones-live' completed.")
-     return drone_data_packet
+     # ORJSONResponse skips FastAPI's jsonable_encoder walk + stdlib json
+     return ORJSONResponse(drone_data_packet)
 
 # Kept the original /fetch-drones-manual as well, it does the same thing now
 @app.get("/fetch-drones-manual")
-async def get_drones_manual() -> Dict[str, Any]:
+async def get_drones_manual() -> ORJSONResponse:
      """Manually trigger the data fetching and processing logic (alternative endpoint)."""
      logger.info("Manual fetch endpoint '/fetch-drones-manual' triggered.")
-     loop = asyncio.get_running_loop()
-     drone_data_packet = await loop.run_in_executor(None, fetch_opensky_data)
+     drone_data_packet = await get_shared_drone_data()
      logger.info("Manual fetch '/fetch-drones-manual' completed.")
-     return drone_data_packet
+     return ORJSONResponse(drone_data_packet)
+
+@functools.lru_cache(maxsize=65536)
+def _zone_for_quantized(lat_q: int, lon_q: int) -> tuple:
+    """Zone check memoized on 1e-4 degree (~11 m) quantized coordinates.
+
+    Far finer than any zone boundary, so cached answers are exact; repeated
+    probes of the same spot skip the check entirely."""
+    return is_unauthorized_flight(lat_q / 1e4, lon_q / 1e4)
 
 @app.post("/force-drone")
-async def force_custom_drone(latitude: float = Query(...), longitude: float = Query(...)) -> Dict[str, Any]:
+async def force_custom_drone(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+) -> Dict[str, Any]:
     """Checks a specific coordinate against restricted zones via POST."""
     logger.info(f"POST /force-drone check request for Lat: {latitude}, Lon: {longitude}")
-    # This check is quick, doesn't strictly need executor unless haversine was very complex
-    unauthorized, zone_name = is_unauthorized_flight(latitude, longitude)
+    if not (_ZONES_BBOX[0] <= latitude <= _ZONES_BBOX[1]
+            and _ZONES_BBOX[2] <= longitude <= _ZONES_BBOX[3]):
+        # Outside the union bbox of every zone — authorized, no lookup needed
+        unauthorized, zone_name = False, None
+    else:
+        unauthorized, zone_name = _zone_for_quantized(round(latitude * 1e4), round(longitude * 1e4))
     return {"callsign": "TEST-DRONE", "latitude": latitude, "longitude": longitude, "unauthorized": unauthorized, "zone": zone_name}
 
 # Manual Email Test Endpoint (Uncomment decorator to enable)
@@ -665,11 +1128,16 @@ async def force_custom_drone(latitude: float = Query(...), longitude: float = Qu
 #          return {"message": "Error calling test email function.", "error": str(e)}
 
 # Root Endpoint
+# Constant body, serialized once — this path doubles as a liveness probe
+_HOME_BODY: bytes = orjson.dumps(
+    {"message": "🚁 Illegal Drone Tracking API with WebSocket running. Connect clients to /ws"}
+)
+
 @app.get("/")
-async def home() -> Dict[str, str]:
+async def home() -> Response:
     """Basic root endpoint indicating the API is running."""
     logger.debug("GET / request received.")
-    return {"message": "🚁 Illegal Drone Tracking API with WebSocket running. Connect clients to /ws"}
+    return Response(content=_HOME_BODY, media_type="application/json")
 
 # --- Server Startup ---
 
@@ -680,5 +1148,9 @@ if __name__ == "__main__":
         host="0.0.0.0",   # Listen on all network interfaces
         port=8000,
         reload=False,     # IMPORTANT: Keep reload=False for stable WebSockets & state
+        loop="auto",      # Picks uvloop when installed (uvicorn[standard])
+        http="auto",      # Picks the httptools C parser when installed
+        ws_ping_interval=20, # Keep NAT/proxy paths from dropping idle sockets
+        ws_per_message_deflate=True, # JSON packets are highly compressible (repeated keys)
         log_level=logging.getLevelName(logger.level).lower() # Sync Uvicorn log level
     )
\ No newline at end of file